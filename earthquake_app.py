@@ -2,10 +2,18 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 from dataclasses import dataclass
+from typing import NamedTuple
+import functools
+import io
 import math
-import plotly.express as px
+import multiprocessing as mp
 import plotly.graph_objects as go
 
+try:
+    from numba import njit
+except ImportError:  # numbaが無い環境ではNumPyによる一括計算を使う
+    njit = None
+
 # 既存のクラス定義をここに含める（EarthquakeParameters, RegionData, NankaiEarthquakeSimulator）
 # ※ 前のコードの@dataclassとクラス定義をそのまま使用
 
@@ -29,6 +37,163 @@ class RegionData:
     coastal: bool
     elevation: float
 
+class BuildingDamage(NamedTuple):
+    """建物被害（地域ごとの棟数）"""
+    collapsed: np.ndarray
+    severe: np.ndarray
+    moderate: np.ndarray
+    undamaged: np.ndarray
+
+class TsunamiResult(NamedTuple):
+    """津波（津波高 m・到達時間 分・浸水面積率）"""
+    height: np.ndarray
+    arrival: np.ndarray
+    inundation: np.ndarray
+
+class Casualties(NamedTuple):
+    """人的被害（地域ごとの人数）"""
+    deaths: np.ndarray
+    serious_injuries: np.ndarray
+    minor_injuries: np.ndarray
+
+class InfrastructureDamage(NamedTuple):
+    """インフラ被害（地域ごとの供給停止率）"""
+    electricity: np.ndarray
+    water: np.ndarray
+    gas: np.ndarray
+
+def _simulate_kernel(magnitude, depth, distances, pops, bldgs, wooden, coastal, elev):
+    """全地域の被害を1回のループで計算するカーネル（numbaでコンパイルして使用）
+    
+    NankaiEarthquakeSimulator._simulate_arrays と同じモデルなので、片方を変えたらもう片方も合わせる
+    （tests/test_kernel_parity.py で一致を確認している）。ガス供給停止率は結果の表に出さないため計算しない。
+    """
+    n = distances.shape[0]
+    intensity_out = np.empty(n)
+    collapsed_out = np.empty(n)
+    severe_out = np.empty(n)
+    tsunami_out = np.empty(n)
+    arrival_out = np.empty(n)
+    deaths_out = np.empty(n)
+    injured_out = np.empty(n)
+    electricity_out = np.empty(n)
+    water_out = np.empty(n)
+    economic_out = np.empty(n)
+    
+    depth_factor = 1 - (depth / 100) * 0.3
+    if magnitude >= 8.0:
+        base_height = 10.0
+    elif magnitude >= 7.5:
+        base_height = 5.0
+    else:
+        base_height = 2.0
+    
+    for i in range(n):
+        # 震度（距離は呼び出し側でキャッシュしたものを受け取る）
+        distance = distances[i]
+        d = max(distance, 1.0)
+        intensity = (magnitude - 3.5 * math.log10(d) - 0.006 * d + 1.5) * depth_factor
+        intensity = min(7.0, max(0.0, intensity))
+        
+        # 建物被害（震度区分ごとの0/1を掛け合わせて分岐をなくす）
+        w = wooden[i]
+        ge7 = 1.0 * (intensity >= 7)
+        ge65 = 1.0 * (intensity >= 6.5)
+        ge6 = 1.0 * (intensity >= 6)
+        ge55 = 1.0 * (intensity >= 5.5)
+        ge5 = 1.0 * (intensity >= 5)
+        m7 = ge7
+        m65 = ge65 - ge7
+        m6 = ge6 - ge65
+        m55 = ge55 - ge6
+        m5 = ge5 - ge55
+        collapse_rate = (
+            m7 * (0.3 * w + 0.05 * (1 - w)) +
+            m65 * (0.15 * w + 0.02 * (1 - w)) +
+            m6 * (0.05 * w + 0.005 * (1 - w)) +
+            m55 * (0.01 * w)
+        )
+        severe_rate = (
+            m7 * (0.4 * w + 0.15 * (1 - w)) +
+            m65 * (0.3 * w + 0.1 * (1 - w)) +
+            m6 * (0.15 * w + 0.05 * (1 - w)) +
+            m55 * (0.05 * w + 0.01 * (1 - w)) +
+            m5 * (0.01 * w)
+        )
+        collapsed = math.floor(bldgs[i] * collapse_rate)
+        severe_damage = math.floor(bldgs[i] * severe_rate)
+        moderate_damage = math.floor(bldgs[i] * severe_rate * 0.5)
+        
+        # 津波（内陸の地域は coastal=0 を掛けて高さ・到達時間とも0にする）
+        tsunami_height = base_height * math.exp(-distance / 500) * coastal[i]
+        if elev[i] > tsunami_height:
+            tsunami_height = 0.0
+        arrival_time = distance / 12 * coastal[i]
+        if tsunami_height > 5:
+            inundation_rate = 0.3
+        elif tsunami_height > 2:
+            inundation_rate = 0.15
+        elif tsunami_height > 0:
+            inundation_rate = 0.05
+        else:
+            inundation_rate = 0.0
+        tsunami_height = np.round(tsunami_height, 1)
+        arrival_time = np.round(arrival_time, 0)
+        
+        # 人的被害
+        building_deaths = math.floor(collapsed * 0.01)
+        building_injuries = math.floor((collapsed + severe_damage) * 0.05)
+        tsunami_deaths = 0.0
+        tsunami_injuries = 0.0
+        if tsunami_height > 0:
+            affected_population = math.floor(pops[i] * inundation_rate)
+            evacuation_rate = min(0.8, arrival_time / 60)
+            non_evacuated = affected_population * (1 - evacuation_rate)
+            if tsunami_height > 2:
+                tsunami_deaths = math.floor(non_evacuated * 0.1)
+            else:
+                tsunami_deaths = math.floor(non_evacuated * 0.02)
+            tsunami_injuries = math.floor(non_evacuated * 0.2)
+        injuries = building_injuries + tsunami_injuries
+        
+        # インフラ被害
+        electricity_outage = ge65 * 0.8 + m6 * 0.5 + m55 * 0.2 + m5 * 0.05
+        water_outage = ge65 * 0.9 + m6 * 0.6 + m55 * 0.3 + m5 * 0.05
+        
+        intensity_out[i] = intensity
+        collapsed_out[i] = collapsed
+        severe_out[i] = severe_damage
+        tsunami_out[i] = tsunami_height
+        arrival_out[i] = arrival_time
+        deaths_out[i] = building_deaths + tsunami_deaths
+        injured_out[i] = math.floor(injuries * 0.3) + math.floor(injuries * 0.7)
+        electricity_out[i] = electricity_outage
+        water_out[i] = water_outage
+        economic_out[i] = (
+            collapsed * 20000000 +
+            severe_damage * 10000000 +
+            moderate_damage * 2000000
+        ) / 100000000
+    
+    return (intensity_out, collapsed_out, severe_out, tsunami_out, arrival_out,
+            deaths_out, injured_out, electricity_out, water_out, economic_out)
+
+# arcp（除算の逆数近似）は切り捨て後の人数が1人ずれることがあるため除外する
+if njit is not None:
+    _simulate_kernel = njit(cache=True, fastmath={"nnan", "ninf", "nsz", "contract", "afn", "reassoc"})(_simulate_kernel)
+else:
+    _simulate_kernel = None
+
+def _intensity_bands(intensity: np.ndarray, thresholds: tuple) -> list:
+    """震度を閾値（降順）ごとの排他的な区分に分け、0/1の配列で返す"""
+    bands = []
+    upper = np.zeros_like(intensity)
+    for threshold in thresholds:
+        at_least = (intensity >= threshold).astype(np.float64)
+        bands.append(at_least - upper)
+        upper = at_least
+    return bands
+
 class NankaiEarthquakeSimulator:
     # 前のコードのNankaiEarthquakeSimulatorクラスをそのまま使用
     def __init__(self):
@@ -42,172 +207,314 @@ class NankaiEarthquakeSimulator:
             RegionData("高知市", 33.5597, 133.5311, 330000, 132000, 0.5, True, 3),
             RegionData("徳島市", 34.0658, 134.5594, 260000, 104000, 0.48, True, 2),
         ]
+        
+        # 地域データを列ごとの配列にまとめる（全地域を一括計算するため）
+        self.names = [r.name for r in self.regions]
+        self.lats = np.array([r.lat for r in self.regions], dtype=np.float64)
+        self.lons = np.array([r.lon for r in self.regions], dtype=np.float64)
+        self.pop = np.array([r.population for r in self.regions], dtype=np.float64)
+        self.bldg = np.array([r.buildings for r in self.regions], dtype=np.float64)
+        self.wooden = np.array([r.wooden_ratio for r in self.regions], dtype=np.float64)
+        self.coastal_mask = np.array([r.coastal for r in self.regions], dtype=np.float32)
+        self.elev = np.array([r.elevation for r in self.regions], dtype=np.float32)
+        
+        # 距離計算で毎回使う地域側の値は事前に計算しておく
+        # （float32に丸めると震度が区分の境界をまたいで結果が変わるため、位置情報はfloat64のまま）
+        self._region_lat_rad = np.radians(self.lats)
+        self._region_lon_rad = np.radians(self.lons)
+        self._region_cos_lat = np.cos(self._region_lat_rad)
+        
+        # 同じ震源位置の距離は使い回す（インスタンスごとのキャッシュにしてselfを保持し続けない）
+        self._cached_distance = functools.lru_cache(maxsize=4096)(self._compute_distance)
+    
+    def calculate_distance(self, lat: float, lon: float) -> np.ndarray:
+        """指定地点から全地域までの距離 (km)。1e-4度単位の格子上にある座標だけキャッシュする"""
+        key = (round(lat, 4), round(lon, 4))
+        if key != (lat, lon):
+            # 格子から外れた入力値は丸めずにそのまま計算する
+            return self._compute_distance(lat, lon)
+        return self._cached_distance(*key)
     
-    def calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    def _compute_distance(self, lat: float, lon: float) -> np.ndarray:
         R = 6371
-        dLat = math.radians(lat2 - lat1)
-        dLon = math.radians(lon2 - lon1)
-        a = math.sin(dLat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dLon/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        return R * c
+        lat_rad = math.radians(lat)
+        dLat = self._region_lat_rad - lat_rad
+        dLon = self._region_lon_rad - math.radians(lon)
+        a = np.sin(dLat/2)**2 + math.cos(lat_rad) * self._region_cos_lat * np.sin(dLon/2)**2
+        c = 2 * np.arcsin(np.sqrt(a))
+        distance = R * c
+        # キャッシュした配列が呼び出し側で書き換えられないようにする
+        distance.flags.writeable = False
+        return distance
     
-    def calculate_seismic_intensity(self, earthquake: EarthquakeParameters, region: RegionData) -> float:
-        distance = self.calculate_distance(
-            earthquake.epicenter_lat, earthquake.epicenter_lon,
-            region.lat, region.lon
-        )
-        if distance < 1:
-            distance = 1
-        intensity = earthquake.magnitude - 3.5 * math.log10(distance) - 0.006 * distance + 1.5
+    def calculate_seismic_intensity(self, earthquake: EarthquakeParameters, distance: np.ndarray) -> np.ndarray:
+        distance = np.maximum(distance, 1)
+        intensity = earthquake.magnitude - 3.5 * np.log10(distance) - 0.006 * distance + 1.5
         depth_factor = 1 - (earthquake.depth / 100) * 0.3
         intensity *= depth_factor
-        return min(7, max(0, intensity))
-    
-    def estimate_building_damage(self, intensity: float, region: RegionData) -> dict:
-        if intensity >= 7:
-            collapse_rate = 0.3 * region.wooden_ratio + 0.05 * (1 - region.wooden_ratio)
-            severe_rate = 0.4 * region.wooden_ratio + 0.15 * (1 - region.wooden_ratio)
-        elif intensity >= 6.5:
-            collapse_rate = 0.15 * region.wooden_ratio + 0.02 * (1 - region.wooden_ratio)
-            severe_rate = 0.3 * region.wooden_ratio + 0.1 * (1 - region.wooden_ratio)
-        elif intensity >= 6:
-            collapse_rate = 0.05 * region.wooden_ratio + 0.005 * (1 - region.wooden_ratio)
-            severe_rate = 0.15 * region.wooden_ratio + 0.05 * (1 - region.wooden_ratio)
-        elif intensity >= 5.5:
-            collapse_rate = 0.01 * region.wooden_ratio
-            severe_rate = 0.05 * region.wooden_ratio + 0.01 * (1 - region.wooden_ratio)
-        else:
-            collapse_rate = 0
-            severe_rate = 0.01 * region.wooden_ratio if intensity >= 5 else 0
-        
-        collapsed = int(region.buildings * collapse_rate)
-        severe_damage = int(region.buildings * severe_rate)
-        moderate_damage = int(region.buildings * severe_rate * 0.5)
-        
-        return {
-            "全壊": collapsed,
-            "半壊": severe_damage,
-            "一部損壊": moderate_damage,
-            "被害なし": region.buildings - collapsed - severe_damage - moderate_damage
-        }
+        return np.clip(intensity, 0, 7)
     
-    def estimate_tsunami(self, earthquake: EarthquakeParameters, region: RegionData) -> dict:
-        if not region.coastal:
-            return {"津波高": 0, "到達時間": 0, "浸水面積率": 0}
-        
-        distance = self.calculate_distance(
-            earthquake.epicenter_lat, earthquake.epicenter_lon,
-            region.lat, region.lon
+    def estimate_building_damage(self, intensity: np.ndarray) -> BuildingDamage:
+        w = self.wooden
+        m7, m65, m6, m55, m5 = _intensity_bands(intensity, (7, 6.5, 6, 5.5, 5))
+        collapse_rate = (
+            m7 * (0.3 * w + 0.05 * (1 - w)) +
+            m65 * (0.15 * w + 0.02 * (1 - w)) +
+            m6 * (0.05 * w + 0.005 * (1 - w)) +
+            m55 * (0.01 * w)
+        )
+        severe_rate = (
+            m7 * (0.4 * w + 0.15 * (1 - w)) +
+            m65 * (0.3 * w + 0.1 * (1 - w)) +
+            m6 * (0.15 * w + 0.05 * (1 - w)) +
+            m55 * (0.05 * w + 0.01 * (1 - w)) +
+            m5 * (0.01 * w)
         )
         
-        if earthquake.magnitude >= 8.0:
-            base_height = 10
-        elif earthquake.magnitude >= 7.5:
-            base_height = 5
-        else:
-            base_height = 2
+        collapsed = np.floor(self.bldg * collapse_rate)
+        severe_damage = np.floor(self.bldg * severe_rate)
+        moderate_damage = np.floor(self.bldg * severe_rate * 0.5)
         
-        tsunami_height = base_height * math.exp(-distance / 500)
+        return BuildingDamage(
+            collapsed=collapsed,
+            severe=severe_damage,
+            moderate=moderate_damage,
+            undamaged=self.bldg - collapsed - severe_damage - moderate_damage
+        )
+    
+    def estimate_tsunami(self, base_height: float, distance: np.ndarray) -> TsunamiResult:
+        tsunami_height = base_height * np.exp(-distance / 500)
+        tsunami_height = np.where(self.elev > tsunami_height, 0, tsunami_height) * self.coastal_mask
         
-        if region.elevation > tsunami_height:
-            tsunami_height = 0
+        arrival_time = distance / 12 * self.coastal_mask
         
-        arrival_time = distance / 12
+        inundation_rate = np.select(
+            [tsunami_height > 5, tsunami_height > 2, tsunami_height > 0],
+            [0.3, 0.15, 0.05],
+            default=0
+        )
         
-        if tsunami_height > 5:
-            inundation_rate = 0.3
-        elif tsunami_height > 2:
-            inundation_rate = 0.15
-        elif tsunami_height > 0:
-            inundation_rate = 0.05
-        else:
-            inundation_rate = 0
+        return TsunamiResult(
+            height=np.round(tsunami_height, 1),
+            arrival=np.round(arrival_time, 0),
+            inundation=inundation_rate
+        )
+    
+    def estimate_casualties(self, intensity: np.ndarray, building_damage: BuildingDamage,
+                          tsunami: TsunamiResult) -> Casualties:
+        building_deaths = np.floor(building_damage.collapsed * 0.01)
+        building_injuries = np.floor((building_damage.collapsed + building_damage.severe) * 0.05)
+        
+        affected_population = np.floor(self.pop * tsunami.inundation)
+        evacuation_rate = np.minimum(0.8, tsunami.arrival / 60)
+        non_evacuated = affected_population * (1 - evacuation_rate)
+        
+        has_tsunami = tsunami.height > 0
+        tsunami_deaths = np.where(
+            has_tsunami,
+            np.floor(np.where(tsunami.height > 2, non_evacuated * 0.1, non_evacuated * 0.02)),
+            0
+        )
+        tsunami_injuries = np.where(has_tsunami, np.floor(non_evacuated * 0.2), 0)
         
-        return {
-            "津波高": round(tsunami_height, 1),
-            "到達時間": round(arrival_time, 0),
-            "浸水面積率": inundation_rate
-        }
+        injuries = building_injuries + tsunami_injuries
+        return Casualties(
+            deaths=building_deaths + tsunami_deaths,
+            serious_injuries=np.floor(injuries * 0.3),
+            minor_injuries=np.floor(injuries * 0.7)
+        )
     
-    def estimate_casualties(self, intensity: float, building_damage: dict, 
-                          tsunami: dict, region: RegionData) -> dict:
-        building_deaths = int(building_damage["全壊"] * 0.01)
-        building_injuries = int((building_damage["全壊"] + building_damage["半壊"]) * 0.05)
-        
-        if tsunami["津波高"] > 0:
-            affected_population = int(region.population * tsunami["浸水面積率"])
-            evacuation_rate = min(0.8, tsunami["到達時間"] / 60)
-            non_evacuated = affected_population * (1 - evacuation_rate)
-            
-            tsunami_deaths = int(non_evacuated * 0.1 if tsunami["津波高"] > 2 else non_evacuated * 0.02)
-            tsunami_injuries = int(non_evacuated * 0.2)
-        else:
-            tsunami_deaths = 0
-            tsunami_injuries = 0
-        
-        return {
-            "死者": building_deaths + tsunami_deaths,
-            "重傷者": int((building_injuries + tsunami_injuries) * 0.3),
-            "軽傷者": int((building_injuries + tsunami_injuries) * 0.7)
-        }
+    def estimate_infrastructure_damage(self, intensity: np.ndarray) -> InfrastructureDamage:
+        m65, m6, m55, m5 = _intensity_bands(intensity, (6.5, 6, 5.5, 5))
+        return InfrastructureDamage(
+            electricity=m65 * 0.8 + m6 * 0.5 + m55 * 0.2 + m5 * 0.05,
+            water=m65 * 0.9 + m6 * 0.6 + m55 * 0.3 + m5 * 0.05,
+            gas=m65 * 0.85 + m6 * 0.55 + m55 * 0.25 + m5 * 0.05
+        )
     
-    def estimate_infrastructure_damage(self, intensity: float, region: RegionData) -> dict:
-        if intensity >= 6.5:
-            electricity_outage = 0.8
-            water_outage = 0.9
-            gas_outage = 0.85
-        elif intensity >= 6:
-            electricity_outage = 0.5
-            water_outage = 0.6
-            gas_outage = 0.55
-        elif intensity >= 5.5:
-            electricity_outage = 0.2
-            water_outage = 0.3
-            gas_outage = 0.25
-        else:
-            electricity_outage = 0.05 if intensity >= 5 else 0
-            water_outage = 0.05 if intensity >= 5 else 0
-            gas_outage = 0.05 if intensity >= 5 else 0
-        
-        return {
-            "停電率": electricity_outage,
-            "断水率": water_outage,
-            "ガス供給停止率": gas_outage
-        }
+    def _simulate_arrays(self, earthquake: EarthquakeParameters) -> tuple:
+        distance = self.calculate_distance(earthquake.epicenter_lat, earthquake.epicenter_lon)
+        intensity = self.calculate_seismic_intensity(earthquake, distance)
+        building_damage = self.estimate_building_damage(intensity)
+        # 津波の基準高はマグニチュードだけで決まるので1回だけ求める
+        base_height = 10.0 if earthquake.magnitude >= 8.0 else 5.0 if earthquake.magnitude >= 7.5 else 2.0
+        tsunami = self.estimate_tsunami(base_height, distance)
+        casualties = self.estimate_casualties(intensity, building_damage, tsunami)
+        infrastructure = self.estimate_infrastructure_damage(intensity)
+        
+        economic_loss = (
+            building_damage.collapsed * 20000000 +
+            building_damage.severe * 10000000 +
+            building_damage.moderate * 2000000
+        ) / 100000000
+        
+        return (
+            intensity,
+            building_damage.collapsed,
+            building_damage.severe,
+            tsunami.height,
+            tsunami.arrival,
+            casualties.deaths,
+            casualties.serious_injuries + casualties.minor_injuries,
+            infrastructure.electricity,
+            infrastructure.water,
+            economic_loss
+        )
+    
+    def _simulate_kernel_arrays(self, earthquake: EarthquakeParameters) -> tuple:
+        distance = self.calculate_distance(earthquake.epicenter_lat, earthquake.epicenter_lon)
+        return _simulate_kernel(
+            float(earthquake.magnitude), float(earthquake.depth), distance,
+            self.pop, self.bldg, self.wooden, self.coastal_mask, self.elev
+        )
+    
+    def _simulate_outputs(self, earthquake: EarthquakeParameters) -> tuple:
+        if _simulate_kernel is not None:
+            return self._simulate_kernel_arrays(earthquake)
+        return self._simulate_arrays(earthquake)
+    
+    def _total_deaths(self, params: tuple) -> tuple:
+        """1シナリオ分の死者数合計を (マグニチュード, 震源深さ, 震源緯度, 震源経度, 死者) で返す"""
+        magnitude, depth, epicenter_lat, epicenter_lon = params
+        deaths = self._simulate_outputs(EarthquakeParameters(
+            magnitude=magnitude,
+            depth=depth,
+            epicenter_lat=epicenter_lat,
+            epicenter_lon=epicenter_lon
+        ))[5]
+        return (magnitude, depth, epicenter_lat, epicenter_lon, int(deaths.sum()))
     
     def simulate(self, earthquake: EarthquakeParameters) -> pd.DataFrame:
-        results = []
-        
-        for region in self.regions:
-            intensity = self.calculate_seismic_intensity(earthquake, region)
-            building_damage = self.estimate_building_damage(intensity, region)
-            tsunami = self.estimate_tsunami(earthquake, region)
-            casualties = self.estimate_casualties(intensity, building_damage, tsunami, region)
-            infrastructure = self.estimate_infrastructure_damage(intensity, region)
-            
-            economic_loss = (
-                building_damage["全壊"] * 20000000 +
-                building_damage["半壊"] * 10000000 +
-                building_damage["一部損壊"] * 2000000
-            ) / 100000000
-            
-            results.append({
-                "地域": region.name,
-                "推定震度": round(intensity, 1),
-                "全壊建物": building_damage["全壊"],
-                "半壊建物": building_damage["半壊"],
-                "津波高(m)": tsunami["津波高"],
-                "津波到達時間(分)": tsunami["到達時間"],
-                "死者": casualties["死者"],
-                "負傷者": casualties["重傷者"] + casualties["軽傷者"],
-                "停電世帯率": f"{infrastructure['停電率']*100:.0f}%",
-                "断水世帯率": f"{infrastructure['断水率']*100:.0f}%",
-                "経済被害(億円)": round(economic_loss, 0)
-            })
-        
-        return pd.DataFrame(results)
+        outputs = self._simulate_outputs(earthquake)
+        (intensity, collapsed, severe_damage, tsunami_height, arrival_time,
+         deaths, injured, electricity, water, economic_loss) = outputs
+        
+        return pd.DataFrame({
+            "地域": pd.Categorical(self.names, categories=self.names, ordered=True),
+            "推定震度": np.round(intensity, 1),
+            "全壊建物": collapsed.astype(np.int32),
+            "半壊建物": severe_damage.astype(np.int32),
+            "津波高(m)": tsunami_height,
+            "津波到達時間(分)": arrival_time,
+            "死者": deaths.astype(np.int32),
+            "負傷者": injured.astype(np.int32),
+            "停電世帯率": electricity.astype(np.float32),
+            "断水世帯率": water.astype(np.float32),
+            "経済被害(億円)": np.round(economic_loss, 0).astype(np.float32)
+        })
+    
+    def simulate_batch(self, params_iterable, workers: int = None) -> pd.DataFrame:
+        """(マグニチュード, 震源深さ, 震源緯度, 震源経度) の組ごとに死者数の合計を一括計算する
+        
+        シナリオ数が少ないうちはプロセスの起動とデータの受け渡しの方が高くつくので、直列で計算する。
+        """
+        params = list(params_iterable)
+        if len(params) < _PARALLEL_MIN_SCENARIOS:
+            rows = [self._total_deaths(p) for p in params]
+        else:
+            n_chunks = -(-len(params) // _BATCH_CHUNKSIZE)
+            workers = min(workers or mp.cpu_count(), n_chunks)
+            with mp.Pool(workers, initializer=_init_worker) as pool:
+                rows = pool.map(_total_deaths_one, params, chunksize=_BATCH_CHUNKSIZE)
+        return pd.DataFrame(rows, columns=["マグニチュード", "震源深さ", "震源緯度", "震源経度", "死者"])
+
+# この数未満のシナリオはプロセスプールを使わずに計算する
+_PARALLEL_MIN_SCENARIOS = 2000
+_BATCH_CHUNKSIZE = 64
+
+# プロセスプールの各ワーカーで使うシミュレーター
+_worker_simulator = None
+
+def _init_worker():
+    global _worker_simulator
+    _worker_simulator = NankaiEarthquakeSimulator()
+
+def _total_deaths_one(params: tuple) -> tuple:
+    """1シナリオ分の計算（プロセス間で受け渡せるようトップレベルに置き、小さなタプルだけを返す）"""
+    return _worker_simulator._total_deaths(params)
 
 # Streamlitアプリケーション
+@st.cache_resource
+def _get_simulator() -> NankaiEarthquakeSimulator:
+    """再実行のたびに地域データを作り直さないよう、シミュレーターを共有する"""
+    return NankaiEarthquakeSimulator()
+
+@st.cache_data
+def _run_simulation(magnitude: float, depth: float, epicenter_lat: float, epicenter_lon: float) -> pd.DataFrame:
+    """同じパラメータでの再実行はキャッシュした結果を返す"""
+    earthquake = EarthquakeParameters(
+        magnitude=magnitude,
+        depth=depth,
+        epicenter_lat=epicenter_lat,
+        epicenter_lon=epicenter_lon
+    )
+    return _get_simulator().simulate(earthquake)
+
+@st.cache_data
+def _run_sweep(magnitude: float, depth: float) -> pd.DataFrame:
+    """震源位置を緯度・経度0.5度刻みで動かした場合の結果をまとめて計算する"""
+    params = [
+        (magnitude, depth, lat, lon)
+        for lat in np.arange(30.0, 36.0 + 0.25, 0.5)
+        for lon in np.arange(130.0, 140.0 + 0.25, 0.5)
+    ]
+    return _get_simulator().simulate_batch(params)
+
+@st.cache_data
+def _to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """BOM付きUTF-8のCSVを、文字列を経由せずにバイト列として書き出す"""
+    buf = io.BytesIO()
+    buf.write(b"\xef\xbb\xbf")
+    df.to_csv(buf, index=False, encoding="utf-8")
+    return buf.getvalue()
+
+# グラフは描画に使う列だけを受け取り、同じ結果なら作り直さない
+def _grouped_bar_fig(df: pd.DataFrame, columns: list, title: str, yaxis_title: str) -> go.Figure:
+    regions = df["地域"].to_numpy()
+    fig = go.Figure([
+        go.Bar(x=regions, y=df[col].to_numpy(), name=col)
+        for col in columns
+    ])
+    fig.update_layout(
+        title=title,
+        barmode="group",
+        xaxis=dict(title="地域"),
+        yaxis=dict(title=yaxis_title),
+        legend=dict(title="被害種別")
+    )
+    return fig
+
+@st.cache_data(ttl=600)
+def _build_casualty_fig(df: pd.DataFrame) -> go.Figure:
+    return _grouped_bar_fig(df, ["死者", "負傷者"], "地域別人的被害", "人数")
+
+@st.cache_data(ttl=600)
+def _build_building_fig(df: pd.DataFrame) -> go.Figure:
+    return _grouped_bar_fig(df, ["全壊建物", "半壊建物"], "地域別建物被害", "棟数")
+
+@st.cache_data(ttl=600)
+def _build_tsunami_fig(df: pd.DataFrame) -> go.Figure:
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=df["地域"],
+        y=df["津波高(m)"],
+        name="津波高(m)",
+        yaxis="y"
+    ))
+    fig.add_trace(go.Scatter(
+        x=df["地域"],
+        y=df["津波到達時間(分)"],
+        name="到達時間(分)",
+        yaxis="y2",
+        mode="lines+markers"
+    ))
+    fig.update_layout(
+        title="津波被害予測",
+        yaxis=dict(title="津波高 (m)"),
+        yaxis2=dict(title="到達時間 (分)", overlaying="y", side="right")
+    )
+    return fig
+
 def main():
     st.set_page_config(
         page_title="南海トラフ地震被害シミュレーター",
@@ -256,29 +563,27 @@ def main():
             step=0.5
         )
         
+        sweep = st.checkbox(
+            "パラメータスイープ",
+            help="震源位置を変えた場合の推定死者数を一覧表示します（計算に時間がかかります）"
+        )
+        
         simulate_button = st.button("シミュレーション実行", type="primary")
     
     # メインエリア
     if simulate_button:
         # シミュレーション実行
-        simulator = NankaiEarthquakeSimulator()
-        earthquake = EarthquakeParameters(
-            magnitude=magnitude,
-            depth=depth,
-            epicenter_lat=epicenter_lat,
-            epicenter_lon=epicenter_lon
-        )
-        
         with st.spinner('シミュレーション中...'):
-            results = simulator.simulate(earthquake)
+            results = _run_simulation(magnitude, depth, epicenter_lat, epicenter_lon)
         
-        # 結果表示
+        # 結果表示（合計はまとめて1回で求める）
+        totals = results[["死者", "全壊建物", "負傷者", "経済被害(億円)"]].sum()
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
             st.metric(
                 "推定死者数",
-                f"{results['死者'].sum():,}人",
+                f"{int(totals['死者']):,}人",
                 delta=None,
                 delta_color="inverse"
             )
@@ -286,19 +591,19 @@ def main():
         with col2:
             st.metric(
                 "全壊建物",
-                f"{results['全壊建物'].sum():,}棟"
+                f"{int(totals['全壊建物']):,}棟"
             )
         
         with col3:
             st.metric(
                 "負傷者数",
-                f"{results['負傷者'].sum():,}人"
+                f"{int(totals['負傷者']):,}人"
             )
         
         with col4:
             st.metric(
                 "経済被害",
-                f"{results['経済被害(億円)'].sum():,.0f}億円"
+                f"{totals['経済被害(億円)']:,.0f}億円"
             )
         
         # グラフ表示
@@ -307,67 +612,57 @@ def main():
         tab1, tab2, tab3 = st.tabs(["人的被害", "建物被害", "津波情報"])
         
         with tab1:
-            fig = px.bar(
-                results,
-                x="地域",
-                y=["死者", "負傷者"],
-                title="地域別人的被害",
-                labels={"value": "人数", "variable": "被害種別"}
-            )
+            fig = _build_casualty_fig(results[["地域", "死者", "負傷者"]])
             st.plotly_chart(fig, use_container_width=True)
         
         with tab2:
-            fig = px.bar(
-                results,
-                x="地域",
-                y=["全壊建物", "半壊建物"],
-                title="地域別建物被害",
-                labels={"value": "棟数", "variable": "被害種別"}
-            )
+            fig = _build_building_fig(results[["地域", "全壊建物", "半壊建物"]])
             st.plotly_chart(fig, use_container_width=True)
         
         with tab3:
-            tsunami_data = results[results["津波高(m)"] > 0]
+            tsunami_data = results.loc[results["津波高(m)"] > 0, ["地域", "津波高(m)", "津波到達時間(分)"]]
             if not tsunami_data.empty:
-                fig = go.Figure()
-                fig.add_trace(go.Bar(
-                    x=tsunami_data["地域"],
-                    y=tsunami_data["津波高(m)"],
-                    name="津波高(m)",
-                    yaxis="y"
-                ))
-                fig.add_trace(go.Scatter(
-                    x=tsunami_data["地域"],
-                    y=tsunami_data["津波到達時間(分)"],
-                    name="到達時間(分)",
-                    yaxis="y2",
-                    mode="lines+markers"
-                ))
-                fig.update_layout(
-                    title="津波被害予測",
-                    yaxis=dict(title="津波高 (m)"),
-                    yaxis2=dict(title="到達時間 (分)", overlaying="y", side="right")
-                )
+                fig = _build_tsunami_fig(tsunami_data)
                 st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info("この震源位置では津波被害は予測されません")
         
-        # 詳細データテーブル
+        # 詳細データテーブル（割合は数値のまま保持し、表示時だけ%表記にする）
+        # Styler経由だと全セルが表示用文字列になるため、小数の列はすべて書式を指定する
         st.subheader("📋 詳細データ")
         st.dataframe(
-            results,
+            results.style.format(precision=1).format("{:.0%}", subset=["停電世帯率", "断水世帯率"]),
             use_container_width=True,
             hide_index=True
         )
         
         # CSVダウンロード
-        csv = results.to_csv(index=False).encode('utf-8-sig')
+        csv = _to_csv_bytes(results)
         st.download_button(
             label="📥 CSVファイルをダウンロード",
             data=csv,
             file_name="earthquake_simulation_results.csv",
             mime="text/csv"
         )
+        
+        # パラメータスイープ
+        if sweep:
+            st.subheader("🗺️ 震源位置別の推定死者数")
+            with st.spinner('パラメータスイープ中...'):
+                sweep_results = _run_sweep(magnitude, depth)
+            total_deaths = sweep_results.pivot(index="震源緯度", columns="震源経度", values="死者")
+            fig = go.Figure(go.Heatmap(
+                x=total_deaths.columns,
+                y=total_deaths.index,
+                z=total_deaths.to_numpy(),
+                colorbar=dict(title="死者数")
+            ))
+            fig.update_layout(
+                title=f"M{magnitude} 深さ{depth}km の震源位置別推定死者数",
+                xaxis=dict(title="震源経度"),
+                yaxis=dict(title="震源緯度")
+            )
+            st.plotly_chart(fig, use_container_width=True)
     
     else:
         # 初期画面
@@ -0,0 +1,37 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import earthquake_app
+from earthquake_app import EarthquakeParameters, NankaiEarthquakeSimulator
+
+OUTPUTS = ("intensity", "collapsed", "severe", "tsunami_height", "arrival",
+           "deaths", "injured", "electricity", "water", "economic_loss")
+
+GRID = list(itertools.product(
+    (7.0, 7.4, 7.5, 7.9, 8.0, 8.4, 8.7, 9.0),
+    (5, 10, 30, 50),
+    (30.0, 32.5, 33.0, 34.5, 35.0, 36.0),
+    (130.0, 133.5, 135.0, 136.0, 138.5, 140.0),
+))
+
+
+@pytest.fixture(scope="module")
+def simulator():
+    if earthquake_app._simulate_kernel is None:
+        pytest.skip("numba is not installed")
+    return NankaiEarthquakeSimulator()
+
+
+def test_kernel_matches_numpy_path(simulator):
+    """numbaカーネルとNumPyによる一括計算が同じ結果を返すこと"""
+    for magnitude, depth, lat, lon in GRID:
+        earthquake = EarthquakeParameters(magnitude, depth, lat, lon)
+        expected = simulator._simulate_arrays(earthquake)
+        actual = simulator._simulate_kernel_arrays(earthquake)
+        for name, e, a in zip(OUTPUTS, expected, actual):
+            np.testing.assert_allclose(
+                a, e, rtol=0, atol=1e-9,
+                err_msg=f"{name} differs at M{magnitude} depth {depth} ({lat}, {lon})"
+            )